@@ -1,68 +1,218 @@
 """
 Supabase client management.
 
-This module provides a small helper to construct and cache a Supabase client.  It
-reads the Supabase URL and anon key from environment variables.  If either
-variable is missing, a runtime error will be raised.  The `get_supabase`
-function can be used as a FastAPI dependency to inject the client into your
-endpoints.
+This module provides small helpers to construct the clients used to talk to
+Supabase.  They read the Supabase URL and anon key from environment variables.
+All clients are asynchronous and share one pooled `httpx.AsyncClient`, which
+is created once when the application starts (see the `lifespan` hook in
+`app.main`) and stored on `app.state`.  The `get_auth` function can be used as
+a FastAPI dependency to inject the Supabase Auth client into your endpoints;
+if the environment variables were missing at startup, a runtime error will be
+raised.
+
+Calls to Supabase should be wrapped in `with_async_backoff`, which retries
+them when Supabase reports rate limiting or a transient server error.
+
+Reads that do not need the REST API can go straight to Postgres through an
+asyncpg pool.  Set `DATABASE_URL` to the Supavisor transaction-mode connection
+string (port 6543 on `pooler.supabase.com`) so that every worker's pool shares
+Supabase's connection pooler instead of opening direct database connections.
 """
 
 from __future__ import annotations
 
+import asyncio
 import os
-from functools import lru_cache
-from typing import Generator
+import random
+from typing import Awaitable, Callable, TypeVar
+
+import httpx
+from fastapi import Request
 
-from fastapi import Depends
+# We intentionally avoid importing gotrue or asyncpg at module load time.
+# Importing them eagerly would raise an ImportError in environments where the
+# libraries are not installed (e.g. during testing), preventing the application
+# from starting.  Instead we perform the import inside the factories below when
+# the corresponding service is actually configured.  This makes the database
+# layer optional: the root endpoint does not depend on Supabase.
 
-# We intentionally avoid importing supabase at module load time.  Importing it
-# eagerly would raise an ImportError in environments where the library is not
-# installed (e.g. during testing), preventing the application from starting.
-# Instead we perform the import inside `get_supabase_client` when the client
-# is actually needed.  This makes the database layer optional: the root
-# endpoint does not depend on Supabase.
+T = TypeVar("T")
 
+# HTTP status codes returned by Supabase that are worth retrying: rate limiting
+# (429) and transient upstream failures.  Only idempotent requests may retry
+# server errors; others should pass `retry_on=RATE_LIMIT_STATUS_CODES`, since a
+# 5xx may arrive after the request already took effect.
+RETRYABLE_STATUS_CODES = frozenset({"429", "500", "502", "503", "504"})
+RATE_LIMIT_STATUS_CODES = frozenset({"429"})
 
-@lru_cache()
-def get_supabase_client():
+
+def create_supabase_http_client() -> httpx.AsyncClient | None:
     """
-    Create and cache the Supabase client.
-
-    The Supabase client is created lazily so that tests not involving the
-    database can run without the `supabase-py` package installed.  When
-    invoked, the function reads the `SUPABASE_URL` and `SUPABASE_ANON_KEY`
-    environment variables and attempts to import the `supabase` module.  If
-    either variable is missing or the module import fails, a `RuntimeError`
-    is raised.
+    Create the HTTP client shared by all Supabase APIs, or ``None`` if unset.
+
+    The client's base URL is the project URL, so PostgREST is reached under
+    `/rest/v1` and Supabase Auth under `/auth/v1`.  The `apikey` and
+    `Authorization` headers are built once here and sent by the client on
+    every request, so callers only supply the path and query.  HTTP/2 is
+    enabled so that concurrent requests are multiplexed over a small number of
+    TLS connections.
     """
 
     url = os.getenv("SUPABASE_URL")
     key = os.getenv("SUPABASE_ANON_KEY")
     if not url or not key:
+        return None
+    headers = {"apikey": key, "Authorization": f"Bearer {key}"}
+    return httpx.AsyncClient(
+        base_url=url.rstrip("/"),
+        headers=headers,
+        http2=True,
+        limits=httpx.Limits(
+            max_keepalive_connections=50, max_connections=200, keepalive_expiry=30.0
+        ),
+        timeout=httpx.Timeout(5.0, connect=2.0),
+    )
+
+
+def create_auth_client(http_client: httpx.AsyncClient):
+    """
+    Create an async Supabase Auth client on top of the shared HTTP client.
+
+    The gateway signs users up on their behalf and never acts as them, so
+    sessions are neither persisted nor refreshed in the background.  If the
+    `gotrue` module cannot be imported, a `RuntimeError` is raised so the
+    misconfiguration surfaces at startup rather than on the first request.
+    """
+
+    try:
+        # Import gotrue lazily.  We cannot annotate the return type as
+        # `gotrue.AsyncGoTrueClient` here because the module may not be
+        # available when type checking is performed.
+        from gotrue import AsyncGoTrueClient  # type: ignore
+    except ImportError as exc:
         raise RuntimeError(
-            "SUPABASE_URL and SUPABASE_ANON_KEY must be set in the environment."
-        )
+            "gotrue is required for authentication. Please install it via 'pip install gotrue'."
+        ) from exc
+    # The API key headers are sent by `http_client` itself.
+    return AsyncGoTrueClient(
+        url=str(http_client.base_url.join("auth/v1")),
+        http_client=http_client,
+        auto_refresh_token=False,
+        persist_session=False,
+    )
+
+
+async def create_pg_pool():
+    """
+    Create an asyncpg pool for `DATABASE_URL`, or return ``None`` if unset.
+
+    Supavisor in transaction mode does not support prepared statements that
+    outlive a transaction, so asyncpg's statement cache is disabled.  If
+    `DATABASE_URL` is set but `asyncpg` cannot be imported, a `RuntimeError` is
+    raised.
+    """
+
+    dsn = os.getenv("DATABASE_URL")
+    if not dsn:
+        return None
     try:
-        # Import supabase lazily.  We cannot annotate the return type as
-        # `supabase.Client` here because the module may not be available when
-        # type checking is performed.
-        from supabase import create_client  # type: ignore
+        import asyncpg  # type: ignore
     except ImportError as exc:
         raise RuntimeError(
-            "supabase-py is required for database operations. Please install it via 'pip install supabase-py'."
+            "asyncpg is required when DATABASE_URL is set. Please install it via 'pip install asyncpg'."
         ) from exc
-    return create_client(url, key)
+    return await asyncpg.create_pool(
+        dsn=dsn,
+        min_size=2,
+        max_size=10,
+        max_inactive_connection_lifetime=30,
+        statement_cache_size=0,
+    )
 
 
-def get_supabase():
+async def get_auth(request: Request):
     """
-    FastAPI dependency to retrieve the cached Supabase client.
+    FastAPI dependency to retrieve the Supabase Auth client created at startup.
 
     Returns
     -------
-    supabase.Client
-        A configured Supabase client.
+    gotrue.AsyncGoTrueClient
+        A configured Supabase Auth client.
     """
 
-    return get_supabase_client()
\ No newline at end of file
+    client = getattr(request.app.state, "auth", None)
+    if client is None:
+        raise RuntimeError(
+            "SUPABASE_URL and SUPABASE_ANON_KEY must be set in the environment."
+        )
+    return client
+
+
+def _is_retryable(exc: Exception, retry_on: frozenset[str]) -> bool:
+    """
+    Return whether a Supabase error carries one of the `retry_on` statuses.
+
+    See `error_status` for how the status is read from the error.
+    """
+
+    status = error_status(exc)
+    return status is not None and str(status) in retry_on
+
+
+def error_status(exc: Exception) -> int | None:
+    """
+    Return the HTTP status carried by a Supabase error, if any.
+
+    PostgREST requests made with `raise_for_status` fail with
+    `httpx.HTTPStatusError`, which exposes the status through its `response`.
+    Supabase Auth requests fail with gotrue's `AuthApiError` or
+    `AuthRetryableError`, which expose it as `status`.  gotrue is inspected by
+    attribute so that this module does not have to import it.
+    """
+
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code
+    status = getattr(exc, "status", None)
+    return status if isinstance(status, int) else None
+
+
+async def with_async_backoff(
+    fn: Callable[[], Awaitable[T]],
+    *,
+    max_retries: int = 5,
+    base: float = 0.1,
+    cap: float = 4.0,
+    retry_on: frozenset[str] = RETRYABLE_STATUS_CODES,
+) -> T:
+    """
+    Await a Supabase request, retrying transient errors with jittered backoff.
+
+    Parameters
+    ----------
+    fn : Callable[[], Awaitable[T]]
+        Zero-argument callable returning a new awaitable for each attempt.
+    max_retries : int
+        Maximum number of retries after the first attempt.
+    base : float
+        Delay in seconds before the first retry; doubled on each attempt.
+    cap : float
+        Upper bound in seconds for the exponential part of the delay.
+    retry_on : frozenset[str]
+        HTTP status codes that trigger a retry; any other error is raised
+        immediately.
+
+    Returns
+    -------
+    T
+        The result of the awaitable returned by `fn`.
+    """
+
+    for attempt in range(max_retries + 1):
+        try:
+            return await fn()
+        except Exception as exc:
+            if attempt == max_retries or not _is_retryable(exc, retry_on):
+                raise
+        await asyncio.sleep(min(cap, base * 2**attempt) + random.random() * 0.1)
+    raise AssertionError("unreachable")
+
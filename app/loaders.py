@@ -0,0 +1,234 @@
+"""
+Request coalescing for user profile lookups.
+
+Concurrent `GET /users/{user_id}` requests would otherwise each issue their own
+query.  The `UserLoader` collects the IDs requested within a short window and
+fetches them with a single `in` query, in the spirit of the DataLoader pattern.
+Requests for the same ID within a window share a single result.
+
+The query itself is supplied as a "fetcher": an async function taking a list of
+IDs and returning the matching rows.  `postgres_fetcher` reads directly from
+Postgres through an asyncpg pool, while `postgrest_fetcher` goes through
+Supabase's REST API.  Both report a failed query as `UserFetchError`, so that
+callers can handle either backend's failures the same way.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional
+from uuid import UUID
+
+import httpx
+from fastapi import Request
+
+from .database import error_status, with_async_backoff
+
+UserRow = dict[str, Any]
+UserFetcher = Callable[[list[str]], Awaitable[list[UserRow]]]
+
+# Columns returned for a user profile.  Selecting them explicitly rather than
+# `*` keeps payloads small and stable if the table gains columns.
+USER_COLUMNS = ("id", "email", "created_at")
+_USERS_SQL = (
+    f"select {', '.join(USER_COLUMNS)} from public.users where id = any($1::uuid[])"
+)
+_USERS_SELECT = ",".join(USER_COLUMNS)
+
+
+def _json_value(value: Any) -> Any:
+    """Convert a value read by asyncpg to the JSON type PostgREST returns."""
+
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def canonical_user_id(user_id: str) -> Optional[str]:
+    """
+    Return `user_id` in canonical UUID form, or ``None`` if it is not a UUID.
+
+    `UUID` also accepts uppercase, braced, URN and unhyphenated spellings,
+    while the database returns IDs in the lowercase hyphenated form.  Using the
+    canonical form for batching, result matching and caching makes every
+    spelling of an ID resolve to the same user.
+    """
+
+    try:
+        return str(UUID(user_id))
+    except ValueError:
+        return None
+
+
+class UserFetchError(Exception):
+    """
+    Raised by a fetcher when its backend could not answer a lookup.
+
+    `status` is the HTTP status of PostgREST's error response, or ``None`` if
+    there was none, e.g. for network failures and Postgres errors.
+    """
+
+    def __init__(self, message: str, status: Optional[int] = None) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class UserLoader:
+    """
+    Batch user lookups into one query per short time window.
+
+    Parameters
+    ----------
+    fetch : UserFetcher
+        Async function returning the `users` rows for a list of IDs.
+    delay : float
+        Seconds to wait for further lookups before a batch is sent.
+    max_batch_size : int
+        Number of distinct IDs after which a batch is sent immediately.
+    """
+
+    def __init__(
+        self,
+        fetch: UserFetcher,
+        delay: float = 0.005,
+        max_batch_size: int = 100,
+    ) -> None:
+        self._fetch = fetch
+        self._delay = delay
+        self._max_batch_size = max_batch_size
+        self._pending: dict[str, asyncio.Future] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Keep references to in-flight batches so they are not garbage
+        # collected before they complete.
+        self._tasks: set[asyncio.Task] = set()
+
+    async def load(self, user_id: str) -> Optional[UserRow]:
+        """Return the profile for `user_id`, or ``None`` if it does not exist."""
+
+        # A malformed ID cannot match any row, and sending it to the database
+        # would make the whole batch fail.
+        user_id = canonical_user_id(user_id)
+        if user_id is None:
+            return None
+
+        future = self._pending.get(user_id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[user_id] = future
+            if len(self._pending) >= self._max_batch_size:
+                self._dispatch()
+            elif self._timer is None:
+                self._timer = loop.call_later(self._delay, self._dispatch)
+        # The future may be shared with other requests, so a cancelled caller
+        # must not cancel it for everyone else.
+        return await asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        task = asyncio.ensure_future(self._flush(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, batch: dict[str, asyncio.Future]) -> None:
+        try:
+            rows = await self._fetch(list(batch))
+        except Exception as exc:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        rows_by_id = {str(row["id"]): row for row in rows}
+        for user_id, future in batch.items():
+            if not future.done():
+                future.set_result(rows_by_id.get(user_id))
+
+
+def postgres_fetcher(pool) -> UserFetcher:
+    """
+    Build a fetcher that reads users directly from Postgres.
+
+    asyncpg decodes `uuid` and `timestamptz` columns to `UUID` and `datetime`,
+    which are converted to the strings PostgREST returns for them, so that
+    rows look the same whichever fetcher produced them.
+
+    Parameters
+    ----------
+    pool : asyncpg.Pool
+        Connection pool created by `app.database.create_pg_pool`.
+    """
+
+    # asyncpg is imported lazily (see `app.database`); it is known to be
+    # available here because `create_pg_pool` returned a pool.
+    import asyncpg  # type: ignore
+
+    # Query errors, lost connections and timeouts acquiring a connection.
+    errors = (
+        asyncpg.PostgresError,
+        asyncpg.InterfaceError,
+        OSError,
+        asyncio.TimeoutError,
+    )
+
+    async def fetch(user_ids: list[str]) -> list[UserRow]:
+        try:
+            rows = await pool.fetch(_USERS_SQL, user_ids)
+        except errors as exc:
+            raise UserFetchError(f"Postgres query failed: {exc!r}") from exc
+        return [{key: _json_value(value) for key, value in row.items()} for row in rows]
+
+    return fetch
+
+
+def postgrest_fetcher(client) -> UserFetcher:
+    """
+    Build a fetcher that reads users through Supabase's REST API.
+
+    Parameters
+    ----------
+    client : httpx.AsyncClient
+        Client created by `app.database.create_supabase_http_client`.
+    """
+
+    async def request(user_ids: list[str]) -> list[UserRow]:
+        response = await client.get(
+            "/rest/v1/users",
+            params={"select": _USERS_SELECT, "id": f"in.({','.join(user_ids)})"},
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def fetch(user_ids: list[str]) -> list[UserRow]:
+        try:
+            return await with_async_backoff(lambda: request(user_ids))
+        except httpx.HTTPError as exc:
+            raise UserFetchError(
+                f"PostgREST request failed: {exc!r}", error_status(exc)
+            ) from exc
+
+    return fetch
+
+
+async def get_user_loader(request: Request) -> UserLoader:
+    """
+    FastAPI dependency to retrieve the `UserLoader` created at startup.
+
+    Returns
+    -------
+    UserLoader
+        The application-wide user loader.
+    """
+
+    loader = getattr(request.app.state, "user_loader", None)
+    if loader is None:
+        raise RuntimeError(
+            "DATABASE_URL, or SUPABASE_URL and SUPABASE_ANON_KEY, must be set in the environment."
+        )
+    return loader
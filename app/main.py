@@ -9,31 +9,121 @@ gateway in development mode, execute:
 ```bash
 uvicorn app.main:app --reload --port 8000 --host 0.0.0.0
 ```
+
+In production, run it under Gunicorn with Uvicorn workers sized to the number
+of CPUs (see `gunicorn.conf.py`):
+
+```bash
+gunicorn -c gunicorn.conf.py app.main:app
+```
+
+Alternatively, Uvicorn can manage the workers itself:
+
+```bash
+uvicorn app.main:app --loop uvloop --http httptools --workers $(nproc) --host 0.0.0.0 --port 8000
+```
 """
 
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-import httpx
+import logging
+from contextlib import asynccontextmanager
 from datetime import datetime
+from typing import AsyncIterator
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel
+
+from .database import create_auth_client, create_pg_pool, create_supabase_http_client
+from .loaders import UserLoader, postgres_fetcher, postgrest_fetcher
+from .middleware import FastCORSMiddleware, MetricsMiddleware, create_metrics_app
+from .users import MissingUserCache, create_user_cache, router as users_router
 
-from .users import router as users_router
+log = logging.getLogger("gateway")
 
-app = FastAPI(title="Gateway API", description="Gateway service for the fullstack template")
+# Bound once so hot endpoints avoid the attribute lookup on every call.
+_now = datetime.now
 
-# Configure CORS.  In this template we allow requests from any origin.  Adjust the
-# `allow_origins` list to restrict to trusted domains in production.
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Manage resources that live for the lifetime of the application.
+
+    A single `httpx.AsyncClient` is shared by all proxy endpoints so that
+    connections to the downstream service are pooled and kept alive rather
+    than re-established on every request.  Supabase is likewise reached
+    through one shared, pre-authenticated client, on top of which the Auth
+    client and the user loader are built.  User lookups read from Postgres
+    directly when `DATABASE_URL` is set and fall back to Supabase's REST API
+    otherwise.  These objects, and the profile caches, are injected into
+    endpoints through dependencies and closed on shutdown.  Everything here
+    runs per worker process, after Gunicorn forks.
+    """
+
+    app.state.user_cache = create_user_cache()
+    app.state.missing_user_cache = MissingUserCache()
+
+    app.state.supabase_http = create_supabase_http_client()
+    app.state.auth = (
+        create_auth_client(app.state.supabase_http)
+        if app.state.supabase_http is not None
+        else None
+    )
+    app.state.pg_pool = await create_pg_pool()
+    if app.state.pg_pool is not None:
+        app.state.user_loader = UserLoader(postgres_fetcher(app.state.pg_pool))
+    elif app.state.supabase_http is not None:
+        app.state.user_loader = UserLoader(postgrest_fetcher(app.state.supabase_http))
+    else:
+        app.state.user_loader = None
+    # The downstream service is reached over plain HTTP, where httpx only
+    # speaks HTTP/1.1, so throughput comes from a generous keep-alive pool.
+    app.state.http_client = httpx.AsyncClient(
+        base_url="http://service:8000",
+        timeout=httpx.Timeout(5.0, connect=2.0),
+        limits=httpx.Limits(
+            max_keepalive_connections=50, max_connections=200, keepalive_expiry=30.0
+        ),
+    )
+    try:
+        yield
+    finally:
+        await app.state.http_client.aclose()
+        if app.state.supabase_http is not None:
+            await app.state.supabase_http.aclose()
+        if app.state.pg_pool is not None:
+            await app.state.pg_pool.close()
+
+
+app = FastAPI(
+    title="Gateway API",
+    description="Gateway service for the fullstack template",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
+# Configure CORS.  In this template we allow requests from any origin.  To
+# restrict access to trusted domains in production, replace this with
+# Starlette's `CORSMiddleware` and an explicit `allow_origins` list.
+app.add_middleware(FastCORSMiddleware)
+
+# Compress larger responses (e.g. user profiles) for clients that accept gzip.
+# Small bodies such as the root health check are sent uncompressed.
+app.add_middleware(GZipMiddleware, minimum_size=512, compresslevel=5)
+
+# Record request metrics.  Added last so that it wraps the other middleware and
+# measures the full time spent in the gateway.
+app.add_middleware(MetricsMiddleware)
+
 # Register routers.  Additional routers should be added here.
 app.include_router(users_router, prefix="/users", tags=["users"])
 
+# Expose Prometheus metrics for scraping, aggregated across worker processes
+# when running under Gunicorn.
+app.mount("/metrics", create_metrics_app())
+
 
 class TextData(BaseModel):
     text: str
@@ -41,55 +131,62 @@ class TextData(BaseModel):
     source: str
 
 
-@app.get("/")
-async def read_root() -> dict[str, str]:
+# The root endpoint is hit constantly by health checks, so its body is
+# serialised once at import time rather than on every request.
+_ROOT_BODY = b'{"message":"Gateway is working"}'
+
+
+@app.get("/", response_class=Response)
+async def read_root() -> Response:
     """Return a simple message confirming that the gateway is alive."""
-    return {"message": "Gateway is working"}
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
 
 @app.post("/process-text")
 async def process_text(data: TextData):
     """
-    Process text data from frontend and print to console.
-    
-    This endpoint receives JSON data from the frontend form and prints it
-    to the console (allegis) for debugging/logging purposes.
+    Process text data from frontend and log it.
+
+    This endpoint receives JSON data from the frontend form and logs it at
+    debug level for debugging purposes.  Nothing is written unless the
+    `gateway` logger is configured to emit debug records, so the endpoint does
+    not perform blocking console I/O on the event loop by default.
     """
     try:
-        # 알기지에 print (console 출력)
-        print("=" * 50)
-        print("📝 FRONTEND에서 전송된 데이터:")
-        print(f"📄 텍스트: {data.text}")
-        print(f"⏰ 타임스탬프: {data.timestamp}")
-        print(f"🔗 소스: {data.source}")
-        print(f"🕐 처리 시간: {datetime.now().isoformat()}")
-        print("=" * 50)
-        
+        processed_at = _now().isoformat()
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(
+                "text=%s timestamp=%s source=%s processed_at=%s",
+                data.text,
+                data.timestamp,
+                data.source,
+                processed_at,
+            )
+
         # 성공 응답 반환
         return {
             "status": "success",
             "message": "데이터가 성공적으로 처리되었습니다",
             "received_text": data.text,
-            "processed_at": datetime.now().isoformat()
+            "processed_at": processed_at,
         }
-        
+
     except Exception as e:
-        print(f"❌ 오류 발생: {str(e)}")
+        log.exception("Failed to process text")
         raise HTTPException(status_code=500, detail=f"데이터 처리 중 오류가 발생했습니다: {str(e)}")
 
 
 @app.get("/service/ping")
-async def proxy_ping() -> dict:
+async def proxy_ping(request: Request) -> dict:
     """
     Proxy a request to the example microservice.
 
     This endpoint demonstrates a simple reverse proxy.  When invoked, it
     dispatches an HTTP request to the `service` container's `/ping` endpoint
-    using an asynchronous HTTP client and returns the JSON payload verbatim.
-    In production you could extend this pattern to perform service discovery,
-    authentication or response transformation.
+    using the shared asynchronous HTTP client and returns the JSON payload
+    verbatim.  In production you could extend this pattern to perform service
+    discovery, authentication or response transformation.
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.get("http://service:8000/ping")
-        response.raise_for_status()
-        return response.json()
\ No newline at end of file
+    response = await request.app.state.http_client.get("/ping")
+    response.raise_for_status()
+    return response.json()
@@ -0,0 +1,146 @@
+"""
+Pure ASGI middleware used by the gateway.
+
+Starlette's stock middleware classes are flexible but do more work per request
+than this template needs.  The middleware defined here operates directly on the
+raw ASGI messages and never constructs `Request` or `Response` objects, which
+keeps the per-request overhead on the hot path to a minimum.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+
+from prometheus_client import CollectorRegistry, Counter, Histogram, make_asgi_app, multiprocess
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "Total HTTP requests handled by the gateway.",
+    ["method", "path", "code"],
+)
+LATENCY = Histogram(
+    "http_request_seconds",
+    "Time spent handling HTTP requests.",
+    ["method", "path"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+
+class FastCORSMiddleware:
+    """
+    Permissive CORS handling for every origin, method and header.
+
+    This is equivalent to configuring Starlette's `CORSMiddleware` with
+    `allow_origins=["*"]`, `allow_methods=["*"]`, `allow_headers=["*"]` and
+    `allow_credentials=True`.  Because credentialed requests may not use a
+    wildcard origin, the request's `Origin` header is echoed back instead.
+    Requests without an `Origin` header are passed through untouched.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin = None
+        request_method = None
+        request_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+
+        cors_headers = [
+            (b"access-control-allow-origin", origin),
+            (b"access-control-allow-credentials", b"true"),
+            (b"vary", b"Origin"),
+        ]
+
+        # Answer preflight requests directly without reaching the router.
+        if scope["method"] == "OPTIONS" and request_method is not None:
+            cors_headers.append((b"access-control-allow-methods", request_method))
+            if request_headers is not None:
+                cors_headers.append((b"access-control-allow-headers", request_headers))
+            cors_headers.append((b"access-control-max-age", b"600"))
+            cors_headers.append((b"content-length", b"0"))
+            await send({"type": "http.response.start", "status": 200, "headers": cors_headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + cors_headers
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class MetricsMiddleware:
+    """
+    Record Prometheus request counts and latencies.
+
+    Requests are labelled by method, status code and route template (e.g.
+    `/users/{user_id}`) rather than the raw path, so that label cardinality
+    stays bounded.  Requests that match no route are grouped under
+    `<unmatched>`.  If the application fails before sending a response, the
+    request is counted with status 500.  See `create_metrics_app` for how
+    values are combined across worker processes.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router records the matched route in the shared scope.
+            route = scope.get("route")
+            path = getattr(route, "path", "<unmatched>")
+            method = scope["method"]
+            LATENCY.labels(method, path).observe(time.perf_counter() - start)
+            REQUESTS.labels(method, path, str(status_code)).inc()
+
+
+def create_metrics_app() -> ASGIApp:
+    """
+    Create the ASGI app serving Prometheus metrics.
+
+    Each Gunicorn worker is a separate process with its own metric values, so
+    a scrape answered by one worker would only see that worker's requests.
+    When `PROMETHEUS_MULTIPROC_DIR` is set (as `gunicorn.conf.py` does), the
+    workers write their values to that directory and this app aggregates them
+    across all workers.  Otherwise, e.g. under a single Uvicorn process, the
+    default in-process registry is served.
+    """
+
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return make_asgi_app(registry)
+    return make_asgi_app()
@@ -9,16 +9,30 @@ extended to suit your application’s needs.
 
 from __future__ import annotations
 
-from typing import Any
+import hashlib
+from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel, Field
+import orjson
+from cachetools import TTLCache
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints
 
-from .database import get_supabase
+from .database import RATE_LIMIT_STATUS_CODES, error_status, get_auth, with_async_backoff
+from .loaders import UserFetchError, UserLoader, canonical_user_id, get_user_loader
 
 
 router = APIRouter()
 
+_USER_CACHE_TTL = 30
+
+# Unknown IDs are remembered only briefly, since a sign up in another worker
+# cannot clear them.
+_MISSING_USER_CACHE_TTL = 2
+
+# Profiles may be cached by the requesting client, but not by shared caches.
+_PROFILE_CACHE_CONTROL = f"private, max-age={_USER_CACHE_TTL}"
+
 
 class UserCreate(BaseModel):
     """
@@ -28,17 +42,54 @@ class UserCreate(BaseModel):
     dependency on `email-validator`.  If you require stricter validation,
     consider adding `email_validator` to your dependencies and changing the
     type annotation back to `EmailStr`.
+
+    Both fields are length-bounded so that oversized payloads are rejected
+    before they are forwarded to Supabase, and unknown fields are ignored.
+    """
+
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
+    email: Annotated[
+        str,
+        StringConstraints(max_length=320),
+        Field(description="User email address"),
+    ]
+    password: Annotated[
+        str,
+        StringConstraints(min_length=8, max_length=256),
+        Field(description="Account password"),
+    ]
+
+
+def _upstream_error_status(
+    upstream_status: int | None,
+    client_error: int = status.HTTP_400_BAD_REQUEST,
+) -> int:
+    """
+    Map the status of a failed Supabase request to the status returned here.
+
+    Rate limiting is passed through, upstream failures are reported as a bad
+    gateway (or as unavailable, if Supabase said so), and any other error is
+    reported as `client_error`.  A missing status or gotrue's status 0 means
+    Supabase could not be reached or gave no usable answer, which is also a
+    bad gateway.
     """
 
-    email: str = Field(..., description="User email address")
-    password: str = Field(..., min_length=8, description="Account password")
+    if upstream_status == status.HTTP_429_TOO_MANY_REQUESTS:
+        return status.HTTP_429_TOO_MANY_REQUESTS
+    if upstream_status == status.HTTP_503_SERVICE_UNAVAILABLE:
+        return status.HTTP_503_SERVICE_UNAVAILABLE
+    if not upstream_status or upstream_status >= 500:
+        return status.HTTP_502_BAD_GATEWAY
+    return client_error
 
 
-@router.post("/", status_code=status.HTTP_201_CREATED)
+@router.post("/", status_code=status.HTTP_201_CREATED, response_class=ORJSONResponse)
 async def create_user(
     user: UserCreate,
-    supabase=Depends(get_supabase),
-) -> dict[str, Any]:
+    request: Request,
+    auth=Depends(get_auth),
+) -> ORJSONResponse:
     """
     Register a new user via Supabase Auth.
 
@@ -46,62 +97,185 @@ async def create_user(
     ----------
     user : UserCreate
         The user credentials to register.
-    supabase : supabase.Client
-        Injected Supabase client.
+    request : Request
+        The incoming request, used to reach the profile cache.
+    auth : gotrue.AsyncGoTrueClient
+        Injected Supabase Auth client.
 
     Returns
     -------
-    dict[str, Any]
+    ORJSONResponse
         A JSON response containing a user ID and email on success.
     """
 
+    # gotrue is imported lazily (see `app.database`); it is known to be
+    # available here because `get_auth` returned a client.
+    from gotrue.errors import AuthError  # type: ignore
+
     # Sign up the user using Supabase Auth.  The response includes user data
-    # and a session object on success, or an error object on failure.
-    result = supabase.auth.sign_up({"email": user.email, "password": user.password})
-    # The supabase-py client returns a dictionary with either 'error' or 'user'
-    error = result.get("error")
-    if error:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=error.get("message", "An unknown error occurred during sign up"),
+    # and a session object on success.  Failures are raised as subclasses of
+    # `AuthError`: `AuthApiError` for error responses, `AuthRetryableError`
+    # for 502-504 and network failures, `AuthUnknownError` for an unreadable
+    # response.  Sign up is not idempotent: a server error may arrive after
+    # the user was created, so only rate limiting is retried.
+    try:
+        result = await with_async_backoff(
+            lambda: auth.sign_up({"email": user.email, "password": user.password}),
+            retry_on=RATE_LIMIT_STATUS_CODES,
         )
+    except AuthError as exc:
+        status_code = _upstream_error_status(error_status(exc))
+        # Messages of upstream failures come from httpx and name the Supabase
+        # URL, so only Supabase's own explanation of a rejection is passed on.
+        if status_code >= 500:
+            detail = "Supabase Auth is unavailable"
+        else:
+            detail = exc.message or "An unknown error occurred during sign up"
+        raise HTTPException(status_code=status_code, detail=detail) from exc
+
+    # The matching row in the public users table is created by the
+    # `on_auth_user_created` trigger (see `supabase/migrations`), in the same
+    # transaction as the auth user, so no second request is needed here.
+    user_id = str(result.user.id)
+    # Drop any "not found" entry left by a lookup before sign up.  This only
+    # reaches this worker's cache; other workers may answer 404 until their
+    # entry expires (see `MissingUserCache`).
+    request.app.state.missing_user_cache.discard(user_id)
+
+    return ORJSONResponse(
+        content={"id": user_id, "email": result.user.email},
+        status_code=status.HTTP_201_CREATED,
+    )
+
+
+def create_user_cache() -> TTLCache:
+    """
+    Create the in-memory cache used by `get_user`.
+
+    Profiles are kept for a short time so that repeated lookups of the same
+    user do not each hit Supabase; concurrent misses are coalesced into batched
+    queries by the `UserLoader`.  Entries hold the serialised JSON body
+    together with its ETag; unknown IDs are kept in a `MissingUserCache`
+    instead.  The cache is created in the `lifespan` hook so that each worker
+    process owns its own instance.
+    """
 
-    user_data = result.get("user")
-    # Save additional profile information in the public users table.  Some
-    # applications choose to store profile data separately from the auth
-    # metadata for greater flexibility.  Here we simply ensure a row exists.
-    supabase.table("users").insert({
-        "id": user_data["id"],
-        "email": user_data["email"],
-    }).execute()
+    return TTLCache(maxsize=10_000, ttl=_USER_CACHE_TTL)
 
-    return {"id": user_data["id"], "email": user_data["email"]}
 
+class MissingUserCache:
+    """
+    Short-lived record of user IDs that were looked up and not found.
+
+    Remembering them keeps repeated lookups of unknown users (e.g. enumeration
+    attempts) in memory.  They are kept apart from the profile cache so that
+    they cannot evict cached profiles, and only for a couple of seconds,
+    because `discard` on sign up only reaches the worker that handled it.
+
+    A lookup can still be in flight when the user signs up.  Its result is
+    stale by the time it arrives, so `add` takes the `generation` read before
+    the lookup started and ignores the ID if a sign up happened since.
+    """
+
+    def __init__(
+        self, maxsize: int = 1_000, ttl: float = _MISSING_USER_CACHE_TTL
+    ) -> None:
+        self._ids: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.generation = 0
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._ids
+
+    def add(self, user_id: str, generation: int) -> None:
+        """Remember `user_id` as unknown if no sign up happened since `generation`."""
+
+        if generation == self.generation:
+            self._ids[user_id] = True
+
+    def discard(self, user_id: str) -> None:
+        """Forget `user_id` and any lookup still in flight."""
+
+        self._ids.pop(user_id, None)
+        self.generation += 1
 
-@router.get("/{user_id}")
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Return whether an `If-None-Match` header matches `etag` (weak comparison)."""
+
+    if not if_none_match:
+        return False
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate == "*" or candidate.removeprefix("W/") == opaque
+        for candidate in (value.strip() for value in if_none_match.split(","))
+    )
+
+
+@router.get("/{user_id}", response_class=ORJSONResponse)
 async def get_user(
     user_id: str,
-    supabase=Depends(get_supabase),
-) -> dict[str, Any]:
+    request: Request,
+    loader: UserLoader = Depends(get_user_loader),
+) -> Response:
     """
     Retrieve a single user profile from the Supabase database.
 
+    Responses carry an `ETag` and a short `Cache-Control` lifetime so that
+    clients can revalidate with `If-None-Match` and receive a `304 Not
+    Modified` without the profile being sent again.
+
     Parameters
     ----------
     user_id : str
         Unique identifier of the user to fetch.
-    supabase : supabase.Client
-        Injected Supabase client.
+    request : Request
+        The incoming request, used to read `If-None-Match`.
+    loader : UserLoader
+        Injected loader that batches concurrent lookups.
 
     Returns
     -------
-    dict[str, Any]
+    Response
         The user profile or an error message if not found.
     """
-    result = supabase.table("users").select("*").eq("id", user_id).single().execute()
-    if result.error:
+    user_id = canonical_user_id(user_id)
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
+        )
+
+    user_cache = request.app.state.user_cache
+    missing_user_cache = request.app.state.missing_user_cache
+    cached = user_cache.get(user_id)
+    if cached is None and user_id not in missing_user_cache:
+        generation = missing_user_cache.generation
+        try:
+            user_data = await loader.load(user_id)
+        except UserFetchError as exc:
+            # The ID has already been validated, so a rejected query is the
+            # gateway's problem rather than the client's.
+            raise HTTPException(
+                status_code=_upstream_error_status(
+                    exc.status, client_error=status.HTTP_502_BAD_GATEWAY
+                ),
+                detail="User lookup failed",
+            ) from exc
+        if user_data is None:
+            missing_user_cache.add(user_id, generation)
+        else:
+            body = orjson.dumps(user_data)
+            # The ETag is weak because GZip encoding may change the bytes sent.
+            etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+            cached = user_cache[user_id] = (body, etag)
+
+    if cached is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=result.error.message,
+            detail="User not found",
         )
-    return result.data
\ No newline at end of file
+    body, etag = cached
+    headers = {"ETag": etag, "Cache-Control": _PROFILE_CACHE_CONTROL}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
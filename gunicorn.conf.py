@@ -0,0 +1,40 @@
+"""
+Gunicorn configuration for running the gateway in production.
+
+Each worker is a Uvicorn worker with its own event loop.  The application is
+imported once in the master process (`preload_app`) and then forked; clients,
+pools and caches are only created in the FastAPI `lifespan` hook, which runs
+inside each worker after the fork, so no sockets are shared between workers.
+Set `WEB_CONCURRENCY` to override the number of workers.
+
+Prometheus metrics run in multiprocess mode: every worker writes its values to
+`PROMETHEUS_MULTIPROC_DIR` and `/metrics` aggregates them, so a scrape reflects
+the whole server rather than whichever worker answered it.  The variable is
+set here, before the application (and `prometheus_client`) is imported.
+"""
+
+import glob
+import multiprocessing
+import os
+
+_metrics_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus-multiproc")
+os.makedirs(_metrics_dir, exist_ok=True)
+
+bind = "0.0.0.0:8000"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+# Uvicorn's worker picks uvloop and httptools automatically when installed.
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+
+def on_starting(server):
+    """Remove metric files left over from a previous run of the server."""
+    for path in glob.glob(os.path.join(_metrics_dir, "*.db")):
+        os.remove(path)
+
+
+def child_exit(server, worker):
+    """Stop reporting live gauges for workers that have exited."""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
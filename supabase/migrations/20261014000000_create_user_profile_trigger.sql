@@ -0,0 +1,22 @@
+-- Create the public profile row in the same transaction as the auth user.
+--
+-- Previously the gateway inserted into public.users with a second request after
+-- calling Supabase Auth's sign up endpoint.  Doing it in a trigger removes that
+-- extra round trip and guarantees an auth user never exists without a profile.
+
+create or replace function public.handle_new_user()
+returns trigger
+language plpgsql
+security definer set search_path = ''
+as $$
+begin
+  insert into public.users (id, email) values (new.id, new.email);
+  return new;
+end;
+$$;
+
+drop trigger if exists on_auth_user_created on auth.users;
+
+create trigger on_auth_user_created
+  after insert on auth.users
+  for each row execute function public.handle_new_user();
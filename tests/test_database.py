@@ -0,0 +1,89 @@
+"""
+Tests for the Supabase retry helper.
+
+`with_async_backoff` is exercised with stub requests raising errors that carry
+an HTTP status, so no Supabase project is required.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.database import RATE_LIMIT_STATUS_CODES, with_async_backoff
+
+
+class StatusError(Exception):
+    """Stand-in for a Supabase error exposing its HTTP status."""
+
+    def __init__(self, status: int) -> None:
+        super().__init__(f"status {status}")
+        self.status = status
+
+
+def make_request(statuses: list[int], calls: list[int]):
+    """Return a request that fails with each status in turn, then succeeds."""
+
+    async def request() -> str:
+        calls.append(1)
+        if len(calls) <= len(statuses):
+            raise StatusError(statuses[len(calls) - 1])
+        return "ok"
+
+    return request
+
+
+def test_retries_transient_errors() -> None:
+    """Ensure rate limiting and server errors are retried until success."""
+    calls: list[int] = []
+    result = asyncio.run(with_async_backoff(make_request([429, 503], calls), base=0))
+    assert result == "ok"
+    assert len(calls) == 3
+
+
+def test_stops_on_non_retryable_error() -> None:
+    """Ensure client errors are raised immediately without retrying."""
+    calls: list[int] = []
+    with pytest.raises(StatusError) as excinfo:
+        asyncio.run(with_async_backoff(make_request([400], calls), base=0))
+    assert excinfo.value.status == 400
+    assert len(calls) == 1
+
+
+def test_retry_on_limits_retried_statuses() -> None:
+    """Ensure server errors are not retried when only 429 is allowed."""
+    calls: list[int] = []
+    with pytest.raises(StatusError) as excinfo:
+        asyncio.run(
+            with_async_backoff(
+                make_request([500], calls), base=0, retry_on=RATE_LIMIT_STATUS_CODES
+            )
+        )
+    assert excinfo.value.status == 500
+    assert len(calls) == 1
+
+
+def test_gives_up_after_max_retries() -> None:
+    """Ensure the last error is raised once the retry budget is exhausted."""
+    calls: list[int] = []
+    with pytest.raises(StatusError) as excinfo:
+        asyncio.run(
+            with_async_backoff(make_request([429] * 5, calls), base=0, max_retries=2)
+        )
+    assert excinfo.value.status == 429
+    assert len(calls) == 3
+
+
+def test_http_status_errors_are_retried() -> None:
+    """Ensure PostgREST errors raised by `raise_for_status` are retried."""
+    calls: list[int] = []
+
+    async def request() -> str:
+        calls.append(1)
+        status = 503 if len(calls) == 1 else 200
+        response = httpx.Response(status, request=httpx.Request("GET", "http://supabase"))
+        response.raise_for_status()
+        return "ok"
+
+    assert asyncio.run(with_async_backoff(request, base=0)) == "ok"
+    assert len(calls) == 2
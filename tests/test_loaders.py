@@ -0,0 +1,211 @@
+"""
+Tests for the batching `UserLoader` and its fetchers.
+
+The loader is exercised with a stub fetcher, and the fetchers with a stub
+asyncpg pool and an `httpx.MockTransport`, so no database is required.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from uuid import UUID
+
+import asyncpg
+import httpx
+import pytest
+
+from app.loaders import UserFetchError, UserLoader, postgres_fetcher, postgrest_fetcher
+
+USER_ID = "8c6976e5-b541-4f5f-8d5b-7a1e2f0c9d3a"
+OTHER_ID = "1f0e3dad-9990-4345-8c5d-2b1b5f26c1c4"
+
+
+def make_fetcher(calls: list[list[str]]):
+    """Return a fetcher that records its calls and returns a row per ID."""
+
+    async def fetch(user_ids: list[str]) -> list[dict]:
+        calls.append(list(user_ids))
+        return [{"id": user_id, "email": f"{user_id}@example.com"} for user_id in user_ids]
+
+    return fetch
+
+
+def test_concurrent_loads_share_one_fetch() -> None:
+    """Ensure concurrent lookups are sent as one batch, deduplicating IDs."""
+    calls: list[list[str]] = []
+
+    async def run():
+        loader = UserLoader(make_fetcher(calls))
+        return await asyncio.gather(
+            loader.load(USER_ID), loader.load(USER_ID), loader.load(OTHER_ID)
+        )
+
+    first, second, other = asyncio.run(run())
+    assert calls == [[USER_ID, OTHER_ID]]
+    assert first == second == {"id": USER_ID, "email": f"{USER_ID}@example.com"}
+    assert other["id"] == OTHER_ID
+
+
+def test_max_batch_size_dispatches_early() -> None:
+    """Ensure a full batch is sent without waiting for the delay."""
+    calls: list[list[str]] = []
+
+    async def run():
+        loader = UserLoader(make_fetcher(calls), delay=60, max_batch_size=2)
+        return await asyncio.wait_for(
+            asyncio.gather(loader.load(USER_ID), loader.load(OTHER_ID)), timeout=1
+        )
+
+    asyncio.run(run())
+    assert calls == [[USER_ID, OTHER_ID]]
+
+
+def test_failed_fetch_propagates_to_every_waiter() -> None:
+    """Ensure a fetch error is raised in every request of the batch."""
+
+    async def fetch(user_ids: list[str]) -> list[dict]:
+        raise RuntimeError("database unavailable")
+
+    async def run():
+        loader = UserLoader(fetch)
+        return await asyncio.gather(
+            loader.load(USER_ID), loader.load(OTHER_ID), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert len(results) == 2
+    for result in results:
+        assert isinstance(result, RuntimeError)
+        assert str(result) == "database unavailable"
+
+
+def test_cancelled_caller_does_not_cancel_shared_future() -> None:
+    """Ensure cancelling one request leaves others for the same ID intact."""
+    calls: list[list[str]] = []
+
+    async def run():
+        loader = UserLoader(make_fetcher(calls))
+        cancelled = asyncio.create_task(loader.load(USER_ID))
+        survivor = asyncio.create_task(loader.load(USER_ID))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        return await survivor
+
+    assert asyncio.run(run())["id"] == USER_ID
+    assert calls == [[USER_ID]]
+
+
+def test_non_canonical_ids_resolve_to_the_same_user() -> None:
+    """Ensure other spellings of a UUID are normalised before matching rows."""
+    calls: list[list[str]] = []
+
+    async def run():
+        loader = UserLoader(make_fetcher(calls))
+        return await asyncio.gather(
+            loader.load(USER_ID.upper()),
+            loader.load("{" + USER_ID + "}"),
+            loader.load(f"urn:uuid:{USER_ID}"),
+            loader.load(USER_ID.replace("-", "")),
+        )
+
+    results = asyncio.run(run())
+    assert calls == [[USER_ID]]
+    assert all(result is not None and result["id"] == USER_ID for result in results)
+
+
+def test_malformed_id_is_not_fetched() -> None:
+    """Ensure IDs that are not UUIDs resolve to None without a query."""
+    calls: list[list[str]] = []
+
+    async def run():
+        loader = UserLoader(make_fetcher(calls))
+        return await loader.load("not-a-uuid")
+
+    assert asyncio.run(run()) is None
+    assert calls == []
+
+
+CREATED_AT = datetime(2026, 10, 14, 12, 30, 0, 123456, tzinfo=timezone.utc)
+
+# The profile of USER_ID as PostgREST returns it.
+USER_ROW = {
+    "id": USER_ID,
+    "email": "user@example.com",
+    "created_at": "2026-10-14T12:30:00.123456+00:00",
+}
+
+
+class StubPool:
+    """Stand-in for an asyncpg pool that records its queries."""
+
+    def __init__(self) -> None:
+        self.queries: list[tuple[str, tuple]] = []
+
+    async def fetch(self, query: str, *args):
+        self.queries.append((query, args))
+        # asyncpg decodes `uuid` and `timestamptz` columns to Python objects.
+        return [{"id": UUID(USER_ID), "email": "user@example.com", "created_at": CREATED_AT}]
+
+
+def test_postgres_fetcher_queries_ids_as_uuid_array() -> None:
+    """Ensure IDs are passed as one array parameter and rows use JSON types."""
+    pool = StubPool()
+    rows = asyncio.run(postgres_fetcher(pool)([USER_ID, OTHER_ID]))
+    assert pool.queries == [
+        (
+            "select id, email, created_at from public.users where id = any($1::uuid[])",
+            ([USER_ID, OTHER_ID],),
+        )
+    ]
+    assert rows == [USER_ROW]
+
+
+def test_postgrest_fetcher_queries_ids_with_in_filter() -> None:
+    """Ensure IDs are sent as an `in` filter and rows are returned as JSON."""
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json=[USER_ROW])
+
+    async def run():
+        transport = httpx.MockTransport(handler)
+        async with httpx.AsyncClient(base_url="http://supabase", transport=transport) as client:
+            return await postgrest_fetcher(client)([USER_ID, OTHER_ID])
+
+    assert asyncio.run(run()) == [USER_ROW]
+    [request] = requests
+    assert request.url.path == "/rest/v1/users"
+    assert dict(request.url.params) == {
+        "select": "id,email,created_at",
+        "id": f"in.({USER_ID},{OTHER_ID})",
+    }
+
+
+class FailingPool:
+    """Stand-in for an asyncpg pool whose queries fail."""
+
+    async def fetch(self, query: str, *args):
+        raise asyncpg.exceptions.TooManyConnectionsError("too many connections")
+
+
+def test_postgres_errors_raise_fetch_error() -> None:
+    """Ensure Postgres failures are reported as `UserFetchError` without a status."""
+    with pytest.raises(UserFetchError) as excinfo:
+        asyncio.run(postgres_fetcher(FailingPool())([USER_ID]))
+    assert excinfo.value.status is None
+    assert isinstance(excinfo.value.__cause__, asyncpg.PostgresError)
+
+
+def test_postgrest_errors_raise_fetch_error() -> None:
+    """Ensure PostgREST error responses are reported with their status."""
+
+    async def run():
+        transport = httpx.MockTransport(lambda request: httpx.Response(401))
+        async with httpx.AsyncClient(base_url="http://supabase", transport=transport) as client:
+            return await postgrest_fetcher(client)([USER_ID])
+
+    with pytest.raises(UserFetchError) as excinfo:
+        asyncio.run(run())
+    assert excinfo.value.status == 401
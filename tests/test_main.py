@@ -2,12 +2,12 @@
 Tests for the FastAPI gateway.
 
 These tests use FastAPI’s built‑in TestClient to verify that the root endpoint
-returns the expected response.  More comprehensive tests for the user
-endpoints would require mocking Supabase responses and are beyond the scope of
-this template.
+returns the expected response.  Tests for the user endpoints, which replace
+Supabase with a stub, live in `test_users.py`.
 """
 
 from fastapi.testclient import TestClient
+from prometheus_client.parser import text_string_to_metric_families
 
 from app.main import app
 
@@ -17,4 +17,50 @@ def test_read_root() -> None:
     client = TestClient(app)
     response = client.get("/")
     assert response.status_code == 200
-    assert response.json() == {"message": "Gateway is working"}
\ No newline at end of file
+    assert response.json() == {"message": "Gateway is working"}
+
+
+def test_cors_preflight() -> None:
+    """Ensure CORS preflight requests are answered for any origin."""
+    client = TestClient(app)
+    response = client.options(
+        "/process-text",
+        headers={
+            "Origin": "http://example.com",
+            "Access-Control-Request-Method": "POST",
+            "Access-Control-Request-Headers": "content-type",
+        },
+    )
+    assert response.status_code == 200
+    assert response.headers["access-control-allow-origin"] == "http://example.com"
+    assert response.headers["access-control-allow-methods"] == "POST"
+    assert response.headers["access-control-allow-headers"] == "content-type"
+
+
+def test_cors_simple_request() -> None:
+    """Ensure CORS headers are added to regular responses."""
+    client = TestClient(app)
+    response = client.get("/", headers={"Origin": "http://example.com"})
+    assert response.status_code == 200
+    assert response.headers["access-control-allow-origin"] == "http://example.com"
+    assert response.headers["access-control-allow-credentials"] == "true"
+
+
+def _requests_total(client: TestClient, **labels: str) -> float:
+    """Return the scraped `http_requests_total` sample matching `labels`."""
+    response = client.get("/metrics/")
+    assert response.status_code == 200
+    for family in text_string_to_metric_families(response.text):
+        for sample in family.samples:
+            if sample.name == "http_requests_total" and sample.labels == labels:
+                return sample.value
+    return 0.0
+
+
+def test_metrics() -> None:
+    """Ensure handled requests are exported as Prometheus metrics."""
+    client = TestClient(app)
+    labels = {"method": "GET", "path": "/", "code": "200"}
+    before = _requests_total(client, **labels)
+    client.get("/")
+    assert _requests_total(client, **labels) == before + 1
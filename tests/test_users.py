@@ -0,0 +1,216 @@
+"""
+Tests for the user endpoints.
+
+Supabase is replaced by a `UserLoader` with a stub fetcher and by a Supabase
+Auth client whose HTTP requests are answered by `httpx.MockTransport`, both
+injected through FastAPI's dependency overrides, so these tests run without a
+Supabase project.
+"""
+
+from functools import partial
+from typing import Callable, Iterator
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from gotrue import AsyncGoTrueClient
+
+from app import users
+from app.database import get_auth, with_async_backoff
+from app.loaders import UserFetchError, UserLoader, get_user_loader
+from app.main import app
+from app.users import MissingUserCache, _etag_matches, create_user_cache
+
+USER_ID = "8c6976e5-b541-4f5f-8d5b-7a1e2f0c9d3a"
+NEW_USER_ID = "1f0e3dad-9990-4345-8c5d-2b1b5f26c1c4"
+SIGN_UP = {"email": "new@example.com", "password": "correct horse"}
+
+
+@pytest.fixture
+def client() -> Iterator[TestClient]:
+    """Provide a client whose user lookups are served by a stub fetcher."""
+
+    async def fetch(user_ids: list[str]) -> list[dict]:
+        return [{"id": USER_ID, "email": "user@example.com"}] if USER_ID in user_ids else []
+
+    app.dependency_overrides[get_user_loader] = lambda: UserLoader(fetch)
+    app.state.user_cache = create_user_cache()
+    app.state.missing_user_cache = MissingUserCache()
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+        del app.state.user_cache
+        del app.state.missing_user_cache
+
+
+def test_get_user_sets_etag(client: TestClient) -> None:
+    """Ensure profiles are returned with an ETag and Cache-Control."""
+    response = client.get(f"/users/{USER_ID}")
+    assert response.status_code == 200
+    assert response.json() == {"id": USER_ID, "email": "user@example.com"}
+    assert response.headers["etag"].startswith('W/"')
+    assert response.headers["cache-control"] == "private, max-age=30"
+
+
+def test_if_none_match_returns_304(client: TestClient) -> None:
+    """Ensure a matching If-None-Match revalidates without a body."""
+    etag = client.get(f"/users/{USER_ID}").headers["etag"]
+    response = client.get(f"/users/{USER_ID}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+def test_stale_if_none_match_returns_profile(client: TestClient) -> None:
+    """Ensure a non-matching If-None-Match gets the full profile."""
+    response = client.get(f"/users/{USER_ID}", headers={"If-None-Match": 'W/"stale"'})
+    assert response.status_code == 200
+    assert response.json()["id"] == USER_ID
+
+
+def test_unknown_user_returns_404(client: TestClient) -> None:
+    """Ensure unknown and malformed IDs are reported as not found."""
+    assert client.get("/users/1f0e3dad-9990-4345-8c5d-2b1b5f26c1c4").status_code == 404
+    assert client.get("/users/not-a-uuid").status_code == 404
+
+
+def test_etag_matches() -> None:
+    """Ensure If-None-Match uses weak comparison and accepts lists and '*'."""
+    etag = 'W/"abc"'
+    assert _etag_matches('W/"abc"', etag)
+    assert _etag_matches('"abc"', etag)
+    assert _etag_matches('"other", W/"abc"', etag)
+    assert _etag_matches("*", etag)
+    assert not _etag_matches('"other"', etag)
+    assert not _etag_matches(None, etag)
+
+
+@pytest.fixture
+def mock_auth(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    """Return a function answering Supabase Auth requests with a handler."""
+
+    # Retry rate-limited sign ups without sleeping.
+    monkeypatch.setattr(users, "with_async_backoff", partial(with_async_backoff, base=0))
+
+    def install(handler: Callable[[httpx.Request], httpx.Response]) -> None:
+        auth = AsyncGoTrueClient(
+            url="http://supabase/auth/v1",
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+            auto_refresh_token=False,
+            persist_session=False,
+        )
+        app.dependency_overrides[get_auth] = lambda: auth
+
+    return install
+
+
+def sign_up_handler(request: httpx.Request) -> httpx.Response:
+    """Answer a Supabase Auth sign up with the new user."""
+    assert request.url.path == "/auth/v1/signup"
+    return httpx.Response(
+        200,
+        json={
+            "id": NEW_USER_ID,
+            "aud": "authenticated",
+            "email": SIGN_UP["email"],
+            "app_metadata": {},
+            "user_metadata": {},
+            "created_at": "2026-10-14T00:00:00Z",
+        },
+    )
+
+
+def test_create_user_returns_201(client: TestClient, mock_auth) -> None:
+    """Ensure a successful sign up returns the new user's ID and email."""
+    mock_auth(sign_up_handler)
+    response = client.post("/users/", json=SIGN_UP)
+    assert response.status_code == 201
+    assert response.json() == {"id": NEW_USER_ID, "email": SIGN_UP["email"]}
+
+
+@pytest.mark.parametrize(
+    ("upstream_status", "expected_status"),
+    [(400, 400), (422, 400), (429, 429), (500, 502), (502, 502), (503, 503)],
+)
+def test_create_user_maps_upstream_errors(
+    client: TestClient, mock_auth, upstream_status: int, expected_status: int
+) -> None:
+    """Ensure Supabase Auth error responses are mapped to gateway statuses."""
+    calls: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(upstream_status, json={"msg": "sign up failed"})
+
+    mock_auth(handler)
+    response = client.post("/users/", json=SIGN_UP)
+    assert response.status_code == expected_status
+    if expected_status < 500:
+        assert response.json() == {"detail": "sign up failed"}
+    else:
+        assert response.json() == {"detail": "Supabase Auth is unavailable"}
+    # Only rate limiting is retried, since sign up is not idempotent.
+    assert len(calls) == (6 if upstream_status == 429 else 1)
+
+
+def test_create_user_unreachable_auth_returns_502(client: TestClient, mock_auth) -> None:
+    """Ensure network failures reaching Supabase Auth are a bad gateway."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("connection refused", request=request)
+
+    mock_auth(handler)
+    assert client.post("/users/", json=SIGN_UP).status_code == 502
+
+
+@pytest.mark.parametrize(
+    ("upstream_status", "expected_status"),
+    [(None, 502), (401, 502), (429, 429), (500, 502), (503, 503)],
+)
+def test_get_user_maps_fetch_errors(
+    client: TestClient, upstream_status: int | None, expected_status: int
+) -> None:
+    """Ensure failed lookups are reported like failed sign ups, and not cached."""
+
+    async def fetch(user_ids: list[str]) -> list[dict]:
+        raise UserFetchError("lookup failed", upstream_status)
+
+    app.dependency_overrides[get_user_loader] = lambda: UserLoader(fetch)
+    response = client.get(f"/users/{USER_ID}")
+    assert response.status_code == expected_status
+    assert response.json() == {"detail": "User lookup failed"}
+    assert USER_ID not in app.state.user_cache
+
+
+def test_sign_up_clears_cached_404(client: TestClient, mock_auth) -> None:
+    """Ensure unknown IDs are cached, and forgotten once the user signs up."""
+    calls: list[list[str]] = []
+    signed_up: set[str] = set()
+
+    async def fetch(user_ids: list[str]) -> list[dict]:
+        calls.append(user_ids)
+        return [{"id": user_id} for user_id in user_ids if user_id in signed_up]
+
+    app.dependency_overrides[get_user_loader] = lambda: UserLoader(fetch)
+    mock_auth(sign_up_handler)
+
+    assert client.get(f"/users/{NEW_USER_ID}").status_code == 404
+    assert client.get(f"/users/{NEW_USER_ID}").status_code == 404
+    assert len(calls) == 1
+
+    signed_up.add(NEW_USER_ID)
+    assert client.post("/users/", json=SIGN_UP).status_code == 201
+    assert client.get(f"/users/{NEW_USER_ID}").json() == {"id": NEW_USER_ID}
+    assert len(calls) == 2
+
+
+def test_missing_user_cache_ignores_lookups_older_than_sign_up() -> None:
+    """Ensure a lookup in flight during a sign up does not cache a stale 404."""
+    cache = MissingUserCache()
+    generation = cache.generation
+    cache.discard(NEW_USER_ID)
+    cache.add(NEW_USER_ID, generation)
+    assert NEW_USER_ID not in cache
+    cache.add(NEW_USER_ID, cache.generation)
+    assert NEW_USER_ID in cache